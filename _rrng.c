@@ -0,0 +1,56 @@
+/* Compiled LCG kernel for rrng.py
+ *
+ * This is optional.  rrng.py loads it with ctypes if the
+ * shared library has been built next to it, e.g. with:
+ *
+ *     cc -O3 -march=native -shared -fPIC -o _rrng.so _rrng.c
+ *
+ * otherwise it falls back to numba or NumPy.
+ *
+ * All arithmetic is on uint64_t so a * x + c wraps around
+ * modulo 2**64.  mask = m - 1 reduces it to a smaller power
+ * of two.
+ */
+
+#include <stddef.h>
+#include <stdint.h>
+
+/* Fill out with the output values x >> d from the next n
+ * states of the LCG with multiplier a and increment c,
+ * starting from state x.  Returns the last state.  Stepping
+ * backwards is done by passing the multiplier and increment
+ * of the reverse LCG.
+ *
+ * The states are computed in four interleaved lanes, each
+ * advancing four steps at a time with the multiplier a4 and
+ * increment c4 of the 4-step jump (a4 = a**4 and
+ * c4 = c * (a**3 + a**2 + a + 1), both modulo m).  The lanes
+ * do not depend on each other, so the multiplies overlap and
+ * the compiler can keep the lanes in one SIMD register (e.g.
+ * vpmullq with AVX-512DQ when built with -march=native).
+ */
+uint64_t lcg_fill4(uint64_t *out, size_t n, uint64_t x, uint64_t a,
+                   uint64_t c, uint64_t a4, uint64_t c4, uint64_t mask,
+                   unsigned int d)
+{
+    uint64_t s[4];
+    uint64_t y = x;
+    size_t i = 0;
+
+    for (int j = 0; j < 4; j++) {
+        y = (a * y + c) & mask;
+        s[j] = y;
+    }
+    for (; i + 4 <= n; i += 4) {
+        for (int j = 0; j < 4; j++)
+            out[i + j] = s[j] >> d;
+        x = s[3];
+        for (int j = 0; j < 4; j++)
+            s[j] = (a4 * s[j] + c4) & mask;
+    }
+    for (int j = 0; i + j < n; j++) {
+        out[i + j] = s[j] >> d;
+        x = s[j];
+    }
+    return x;
+}
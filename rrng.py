@@ -1,10 +1,43 @@
 # Pseudo-Random Number Generation Algorithms
 
+import ctypes
+import os
+from functools import lru_cache
+
 import numpy as np
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+def _load_clib(path):
+    """Returns the compiled kernels in the shared library at
+    path (see _rrng.c), or None if it cannot be loaded or was
+    built from an older version of _rrng.c.
+    """
+    try:
+        lib = ctypes.CDLL(path)
+        lib.lcg_fill4.argtypes = [
+            ctypes.POINTER(ctypes.c_uint64), ctypes.c_size_t,
+            ctypes.c_uint64, ctypes.c_uint64, ctypes.c_uint64,
+            ctypes.c_uint64, ctypes.c_uint64, ctypes.c_uint64,
+            ctypes.c_uint
+        ]
+    except (OSError, AttributeError):
+        return None
+    lib.lcg_fill4.restype = ctypes.c_uint64
+    return lib
+
+
+# Optional compiled kernels (see _rrng.c for build instructions)
+_clib = _load_clib(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '_rrng.so'))
+
 
 def is_power_of_two(x):
-    return (x & (x - 1)) == 0
+    return x > 0 and not (x & (x - 1))
 
 
 def xgcd_x(a, b):
@@ -27,21 +60,173 @@ def xgcd_x(a, b):
     return x_prev
 
 
-# Pre-computed values for faster execution
-a_inverse_stored = {} 
+def mod_inverse_pow2(a, k):
+    """Returns the multiplicative inverse of the odd integer
+    a modulo 2**k.
+
+    Uses Newton's iteration
+
+        x = x * (2 - a * x) % 2**k
+
+    which doubles the number of correct low-order bits at each
+    step, starting from x = (3 * a) ^ 2 which is correct to 5
+    bits.  Only 4 iterations are needed for k = 64.
 
+    See J. Hurchalla, "An Improved Integer Multiplicative
+    Inverse (modulo 2^w)" (2022).
+    """
+    assert a & 1, "`a` must be odd."
+    mask = (1 << k) - 1
+    x = (3 * a) ^ 2
+    bits = 5
+    while bits < k:
+        x = (x * (2 - a * x)) & mask
+        bits *= 2
+    return x & mask
+
+
+@lru_cache(maxsize=128)
 def get_a_inverse_value(a, b):
     """Returns a pre-calculated value of a_inverse if one
-    exists otherwise calculates it using the extended
-    Euclidean algoriothm, xgcd_x(a, b).
+    exists otherwise calculates it using mod_inverse_pow2
+    if b is a power of two or the extended Euclidean
+    algoriothm, xgcd_x(a, b).
     """
-    if (a, b) in a_inverse_stored:
-        return a_inverse_stored[(a, b)]
+    if is_power_of_two(b):
+        return mod_inverse_pow2(a, b.bit_length() - 1)
     else:
-        x = xgcd_x(a, b)
-        a_inverse_stored[(a, b)] = x
+        return xgcd_x(a, b)
+
+
+# Default LCG parameters (Knuth's MMIX multiplier and increment)
+_DEFAULT_M = 1 << 63
+_DEFAULT_A = 6364136223846793005
+_DEFAULT_C = 1442695040888963407
+_DEFAULT_A_INV = mod_inverse_pow2(_DEFAULT_A, 63)
+
+
+def _skip_ahead_coeffs(a, c, m, n):
+    """Returns arrays of the multipliers and increments that
+    advance an LCG by i = 1, 2, ..., n steps in one operation:
+
+        a_i = a**i % m
+        c_i = c * (a**i - 1) / (a - 1) % m
+
+    so that x_i = (a_i * x_0 + c_i) % m.  The arrays are
+    built by repeated doubling, using the composition rule
+    for two LCG steps (a_j, c_j) after (a_k, c_k):
+
+        a_(j+k) = a_j * a_k % m
+        c_(j+k) = (a_j * c_k + c_j) % m
+
+    See F. Brown, "Random number generation with arbitrary
+    strides", Trans. Am. Nucl. Soc. 71 (1994).
+
+    m must be a power of two no greater than 2**64 so that
+    the arithmetic can be done with wrap-around in uint64.
+    """
+    a_vec = np.empty(n, dtype='uint64')
+    c_vec = np.empty(n, dtype='uint64')
+    if n == 0:
+        return a_vec, c_vec
+    a_vec[0] = a & (m - 1)
+    c_vec[0] = c & (m - 1)
+    k = 1
+    with np.errstate(over='ignore'):
+        while k < n:
+            j = min(k, n - k)
+            a_vec[k:k+j] = a_vec[:j] * a_vec[k-1]
+            c_vec[k:k+j] = a_vec[:j] * c_vec[k-1] + c_vec[:j]
+            k += j
+    if m < 1 << 64:
+        mask = np.uint64(m - 1)
+        a_vec &= mask
+        c_vec &= mask
+    return a_vec, c_vec
+
+
+def _jump_coeffs(a, c, m, k):
+    """Returns the multiplier and increment (a_k, c_k) that
+    advance an LCG by k >= 0 steps in one operation:
+
+        x_k = (a_k * x_0 + c_k) % m
+
+    The pair is computed in O(log k) operations by binary
+    powering of the composition rule used in
+    _skip_ahead_coeffs.
+    """
+    mask = m - 1
+    a_k, c_k = 1, 0
+    a, c = a & mask, c & mask
+    while k:
+        if k & 1:
+            a_k, c_k = (a * a_k) & mask, (a * c_k + c) & mask
+        a, c = (a * a) & mask, ((a + 1) * c) & mask
+        k >>= 1
+    return a_k, c_k
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _lcg_fill(out, x, a, c, mask, d):
+        """Fills the array out with the output values x >> d
+        from the next states of an LCG starting from state x
+        and returns the last state.  All arguments must be
+        uint64 so that a * x + c wraps around modulo 2**64.
+        """
+        for i in range(out.shape[0]):
+            x = (a * x + c) & mask
+            out[i] = x >> d
         return x
 
+    @njit(cache=True)
+    def _lcg_fill_rev(out, x, a_inverse, c, mask, d):
+        """Fills the array out with the output values x >> d
+        from the previous states of an LCG starting from state
+        x and returns the last state (see _lcg_fill).
+        """
+        for i in range(out.shape[0]):
+            x = a_inverse * (x - c) & mask
+            out[i] = x >> d
+        return x
+
+    @njit(cache=True)
+    def _lcg_fill_f64(out, x, a, c, mask, shift, scale):
+        """Fills the float64 array out with values
+        (x >> shift) * scale from the next states of an LCG
+        starting from state x and returns the last state (see
+        _lcg_fill).
+        """
+        for i in range(out.shape[0]):
+            x = (a * x + c) & mask
+            out[i] = (x >> shift) * scale
+        return x
+
+    @njit(cache=True, parallel=True)
+    def _lcg_fill_parallel(out, starts, a, c, mask, d, stride):
+        """Fills the array out with the output values x >> d
+        from the next states of an LCG in parallel.  Chunk t of
+        length stride is filled starting from state starts[t]
+        (see _lcg_fill).
+        """
+        n = out.shape[0]
+        for t in prange(starts.shape[0]):
+            x = starts[t]
+            for i in range(t * stride, min((t + 1) * stride, n)):
+                x = (a * x + c) & mask
+                out[i] = x >> d
+
+    # Compile at import rather than on the first call
+    _one = np.uint64(1)
+    _lcg_fill(np.empty(1, dtype=np.uint64), _one, _one, _one, _one, _one)
+    _lcg_fill_rev(np.empty(1, dtype=np.uint64), _one, _one, _one, _one, _one)
+    _lcg_fill_f64(np.empty(1, dtype=np.float64), _one, _one, _one, _one,
+                  _one, 1.0)
+    _lcg_fill_parallel(np.empty(1, dtype=np.uint64),
+                       np.ones(1, dtype=np.uint64), _one, _one, _one, _one, 1)
+    del _one
+
 
 class ReversibleLCG:
     """Reversible Linear Congruential Generator
@@ -58,6 +243,9 @@ class ReversibleLCG:
     
     where a, c, and m are constants. With appropriate choice
     of these parameters, the period of the sequence is long.
+    m must be a power of two no greater than 2**64.  With
+    m = 2**64 the vectorized methods rely on the natural
+    wrap-around of uint64 arithmetic and need no masking.
     
     The d least-significant bits of x are removed and the
     output value returned by the generator is given by
@@ -86,15 +274,30 @@ class ReversibleLCG:
         Maximum value that can be produced.
     """
 
-    def __init__(self, seed, m=1<<63, a=6364136223846793005, 
-                 c=1442695040888963407, d=32):
+    __slots__ = ('_x', '_m', '_a', '_c', '_d', '_a_inverse', '_max',
+                 'forward', '_mask', '_a_u64', '_c_u64', '_a_inverse_u64',
+                 '_mask_u64')
+
+    def __init__(self, seed, m=_DEFAULT_M, a=_DEFAULT_A, c=_DEFAULT_C,
+                 d=32):
+        assert m > 0 and not (m & (m - 1)), "`m` must be a power of two."
+        assert m <= 1<<64, "`m` must not be greater than 2**64."
+        self._mask = m - 1
         self.x = seed
-        assert is_power_of_two(m), "`m` must be a power of two."
         self._m = m
         self._a = a
         self._c = c
         self._d = d
-        self._a_inverse = get_a_inverse_value(self._a, self._m)
+        if a is _DEFAULT_A and m is _DEFAULT_M:
+            self._a_inverse = _DEFAULT_A_INV
+        else:
+            self._a_inverse = get_a_inverse_value(a, m)
+        self._max = self._mask >> d
+        # uint64 copies of the constants for the vectorized methods
+        self._a_u64 = np.uint64(a & self._mask)
+        self._c_u64 = np.uint64(c & self._mask)
+        self._a_inverse_u64 = np.uint64(self._a_inverse & self._mask)
+        self._mask_u64 = np.uint64(self._mask)
         self.forward = True
 
     @property
@@ -117,38 +320,66 @@ class ReversibleLCG:
     def a_inverse(self):
         return self._a_inverse
 
+    @property
+    def max(self):
+        return self._max
+
     @property
     def x(self):
         return self._x
 
     @x.setter
     def x(self, value):
-        self._x = value
-
-    @property
-    def max(self):
-        return (self._m - 1) >> self._d
+        # Reduce modulo m so the state always fits in uint64
+        self._x = value & self._mask
 
     def __iter__(self):
         return self
 
     def __next__(self):
+        # Steps are inlined here to avoid two extra method calls
+        # per value when iterating
         if self.forward:
-            return self.next()
+            self._x = (self._a * self._x + self._c) & self._mask
         else:
-            return self.prev()
+            self._x = self._a_inverse * (self._x - self._c) & self._mask
+        return self._x >> self._d
 
     def _next_state(self):
         # nextx = (a * x + c) % m
-        return (self._a * self._x + self._c) & (self._m - 1)
+        return (self._a * self._x + self._c) & self._mask
 
     def _prev_state(self):
         # prevx = (ainverse * (x - c)) mod m
-        return self._a_inverse * (self._x - self._c) & (self._m - 1)
+        return self._a_inverse * (self._x - self._c) & self._mask
+
+    def _coeffs(self, increment):
+        """Returns the multiplier and increment that advance
+        the state by `increment` steps (negative values step
+        backwards).
+        """
+        if increment == 1:
+            return self._a, self._c
+        if increment == -1:
+            # Stepping backwards is also an LCG:
+            # prevx = (ainverse * x - ainverse * c) % m
+            return self._a_inverse, -self._a_inverse * self._c
+        if increment < 0:
+            return _jump_coeffs(self._a_inverse, -self._a_inverse * self._c,
+                                self._m, -increment)
+        return _jump_coeffs(self._a, self._c, self._m, increment)
 
     def reverse(self):
         self.forward = not self.forward
 
+    def jump(self, k):
+        """Move k steps through the sequence (backwards if k
+        is negative) and return the value there.
+        """
+        a_k, c_k = self._coeffs(k)
+        self._x = (a_k * self._x + c_k) & self._mask
+        return self._x >> self._d
+
     def next(self):
         """Compute and return next value in sequence
         (forwards).
@@ -171,24 +402,20 @@ class GeneratorLCGReversible(ReversibleLCG):
     The LCG is a type of pseudo-random number generator that
     supports generating random numbers in two directions (i.e.
     forwards and backwards).
-    """
 
-    def __init__(self, seed=0):
-        super().__init__(seed)
+    Arrays of integers from random() are filled by the compiled
+    kernel in _rrng.c if the shared library has been built,
+    otherwise by numba if it is installed, otherwise with NumPy.
+    random_f64() uses numba if it is installed, otherwise NumPy.
+    """
 
-    @staticmethod
-    def _next_state_generator(x, m, a, c):
-        while True:
-            x = (a*x + c) & (m - 1)
-            yield x
+    __slots__ = ()
 
-    @staticmethod
-    def _prev_state_generator(x, m, a_inverse, c):
-        while True:
-            x = a_inverse * (x - c) & (m - 1)
-            yield x
+    def __init__(self, seed=0, m=_DEFAULT_M, a=_DEFAULT_A, c=_DEFAULT_C,
+                 d=32):
+        super().__init__(seed, m=m, a=a, c=c, d=d)
 
-    def random(self, size=None, update=True, increment=None):
+    def random(self, size=None, update=True, increment=None, threads=None):
         """Return random integers.
         
         Parameters
@@ -200,8 +427,14 @@ class GeneratorLCGReversible(ReversibleLCG):
             Determines whether the rng's state is updated after this operation
             or not. Default is True.
         increment : int
+            Number of steps to move through the sequence between values.
             Set to 1 to step fowards in the sequence and -1 to step backwards.
-            (Other increments not supported).
+            Default is None, in which case the current direction is used.
+        threads : int
+            Number of threads used to fill the output array.  The array is
+            split into one chunk per thread and the starting state of each
+            chunk is found by jumping ahead.  Only used if numba is
+            installed.  Default is None (single-threaded).
     
         Returns
         -------
@@ -221,23 +454,323 @@ class GeneratorLCGReversible(ReversibleLCG):
         if increment is None:
             increment = 1 if self.forward else -1
         else:
-            assert increment in (-1, 1), "`increment` must be -1, None, or 1."
+            assert increment != 0, "`increment` must not be zero."
             if update:
-                self.forward = True if increment == 1 else False
+                self.forward = increment > 0
         if size is None:
             if update:
-                return self.__next__()
-            if increment == 1:
-                return self._next_state() >> self._d
+                if increment in (-1, 1):
+                    return self.__next__()
+                return self.jump(increment)
+            a, c = self._coeffs(increment)
+            return ((a * self._x + c) & self._mask) >> self._d
+        else:
+            assert isinstance(size, (int, np.integer)) and size >= 0, \
+                "only 1-D arrays supported"
+            state, mask, m = self._x, self._mask, self._m
+            x = np.empty(size, dtype='uint64')
+            d = np.uint64(self._d)
+            if njit is not None and threads is not None and threads > 1 \
+                    and size > 0:
+                a, c = self._coeffs(increment)
+                stride = -(-size // threads)
+                a_stride, c_stride = _jump_coeffs(a, c, m, stride)
+                starts = np.empty(-(-size // stride), dtype='uint64')
+                start = state
+                for t in range(starts.shape[0]):
+                    starts[t] = start
+                    start = (a_stride * start + c_stride) & mask
+                _lcg_fill_parallel(x, starts, np.uint64(a & mask),
+                                   np.uint64(c & mask), self._mask_u64,
+                                   d, stride)
+                a_n, c_n = _jump_coeffs(a, c, m, size)
+                last = (a_n * state + c_n) & mask
+            elif _clib is not None:
+                a, c = self._coeffs(increment)
+                a4, c4 = _jump_coeffs(a, c, m, 4)
+                last = _clib.lcg_fill4(
+                    x.ctypes.data_as(ctypes.POINTER(ctypes.c_uint64)), size,
+                    state, a & mask, c & mask, a4, c4, mask, self._d
+                )
+            elif njit is not None:
+                if increment == 1:
+                    last = _lcg_fill(x, np.uint64(state), self._a_u64,
+                                     self._c_u64, self._mask_u64, d)
+                elif increment == -1:
+                    last = _lcg_fill_rev(x, np.uint64(state),
+                                         self._a_inverse_u64, self._c_u64,
+                                         self._mask_u64, d)
+                else:
+                    a, c = self._coeffs(increment)
+                    last = _lcg_fill(x, np.uint64(state), np.uint64(a),
+                                     np.uint64(c), self._mask_u64, d)
             else:
-                return self._prev_state() >> self._d
+                a, c = self._coeffs(increment)
+                a_vec, c_vec = _skip_ahead_coeffs(a, c, m, size)
+                with np.errstate(over='ignore'):
+                    np.multiply(a_vec, np.uint64(state), out=x)
+                    x += c_vec
+                if m < 1<<64:
+                    x &= self._mask_u64
+                last = x[-1] if size > 0 else state
+                np.right_shift(x, d, out=x)
+            if update:
+                self._x = int(last)
+            return x
+
+    def random_f64(self, size=None, update=True, increment=None):
+        """Return random floats in the half-open interval [0.0, 1.0).
+
+        Each float is made from the 53 most significant bits of the
+        state (all of them if m is smaller than 2**53).  If numba is
+        installed the conversion is done while the array is filled so
+        no intermediate array of integers is created.  The kernels in
+        _rrng.c are not used by this method.
+
+        Parameters
+        ----------
+        size : int
+            Output size.  Default is None, in which case a single value is
+            returned.
+        update : bool
+            Determines whether the rng's state is updated after this operation
+            or not. Default is True.
+        increment : int
+            Number of steps to move through the sequence between values.
+            Default is None, in which case the current direction is used.
+
+        Returns
+        -------
+        out : float or ndarray of float64
+            1-D array of random floats of size `size` (unless ``size=None``,
+            in which case a single float is returned).
+        """
+
+        if increment is None:
+            increment = 1 if self.forward else -1
+        else:
+            assert increment != 0, "`increment` must not be zero."
+            if update:
+                self.forward = increment > 0
+        bits = self._m.bit_length() - 1
+        shift = max(bits - 53, 0)
+        scale = 1.0 / (1 << (bits - shift))
+        a, c = self._coeffs(increment)
+        a, c = a & self._mask, c & self._mask
+        if size is None:
+            x = (a * self._x + c) & self._mask
+            if update:
+                self._x = x
+            return (x >> shift) * scale
+        assert isinstance(size, (int, np.integer)) and size >= 0, \
+            "only 1-D arrays supported"
+        out = np.empty(size, dtype='float64')
+        if njit is not None:
+            last = _lcg_fill_f64(out, np.uint64(self._x), np.uint64(a),
+                                 np.uint64(c), self._mask_u64,
+                                 np.uint64(shift), scale)
         else:
+            x, c_vec = _skip_ahead_coeffs(a, c, self._m, size)
+            with np.errstate(over='ignore'):
+                x *= np.uint64(self._x)
+                x += c_vec
+            if self._m < 1<<64:
+                x &= self._mask_u64
+            last = x[-1] if size > 0 else self._x
+            x >>= np.uint64(shift)
+            np.multiply(x, scale, out=out)
+        if update:
+            self._x = int(last)
+        return out
+
+
+# Philox-4x32 constants (Salmon et al. 2011)
+_PHILOX_M0 = 0xD2511F53
+_PHILOX_M1 = 0xCD9E8D57
+_PHILOX_W0 = 0x9E3779B9
+_PHILOX_W1 = 0xBB67AE85
+
+
+def _philox4x32(ctr, key, rounds=10):
+    """Philox-4x32 counter-based bijection.
+
+    ctr is a tuple of four 32-bit counter words and key is a
+    tuple of two 32-bit key words.  The counter words may be
+    Python ints or uint64 arrays holding 32-bit values, in
+    which case all the counters are mixed at once.  Returns
+    the four 32-bit output words in the same form.
+
+    See J. K. Salmon, M. A. Moraes, R. O. Dror and D. E. Shaw,
+    "Parallel random numbers: as easy as 1, 2, 3", SC '11
+    (the Random123 library).
+    """
+    x0, x1, x2, x3 = ctr
+    k0, k1 = key
+    for r in range(rounds):
+        if r > 0:
+            k0 = (k0 + _PHILOX_W0) & 0xFFFFFFFF
+            k1 = (k1 + _PHILOX_W1) & 0xFFFFFFFF
+        p0 = _PHILOX_M0 * x0
+        p1 = _PHILOX_M1 * x2
+        x0, x1, x2, x3 = ((p1 >> 32) ^ x1 ^ k0, p1 & 0xFFFFFFFF,
+                          (p0 >> 32) ^ x3 ^ k1, p0 & 0xFFFFFFFF)
+    return x0, x1, x2, x3
+
+
+class ReversiblePhilox:
+    """Reversible counter-based random number generator
+    
+    Each output value is a fixed function of its position in
+    the sequence, computed with the Philox-4x32-10 bijection.
+    Stepping forwards or backwards, or jumping any distance,
+    only changes the position, so there is no dependency
+    between values and arrays of them are computed in one
+    vectorized pass.  Streams with different seeds are
+    statistically independent, which makes this generator
+    suited to parallel Monte Carlo simulations.
+    
+    The internal state of the generator is the position, x.
+    Each Philox block produces four 32-bit words, so the value
+    at position x is word x % 4 of the block with counter
+    x // 4.  The values generated are in the range 0 to
+    2**32 - 1.
+    
+    Arguments
+    ----------
+    seed : int
+        Key of the generator (up to 64 bits).
+    x : int
+        Initial position in the sequence.
+    max : int
+        Maximum value that can be produced.
+    """
+
+    __slots__ = ('_x', '_key', '_max', 'forward')
+
+    def __init__(self, seed=0, x=0):
+        self._key = (seed & 0xFFFFFFFF, (seed >> 32) & 0xFFFFFFFF)
+        self.x = x
+        self._max = 0xFFFFFFFF
+        self.forward = True
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def max(self):
+        return self._max
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = value & 0xFFFFFFFFFFFFFFFF
+
+    def _value(self, x):
+        ctr = x >> 2
+        words = _philox4x32((ctr & 0xFFFFFFFF, ctr >> 32, 0, 0), self._key)
+        return words[x & 3]
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.forward:
+            return self.next()
+        else:
+            return self.prev()
+
+    def reverse(self):
+        self.forward = not self.forward
+
+    def jump(self, k):
+        """Move k steps through the sequence (backwards if k
+        is negative) and return the value there.
+        """
+        self.x = self._x + k
+        return self._value(self._x)
+
+    def next(self):
+        """Compute and return next value in sequence
+        (forwards).
+        """
+        return self.jump(1)
+
+    def prev(self):
+        """Compute and return previous value in sequence
+        (backwards).
+        """
+        return self.jump(-1)
+
+    def random(self, size=None, update=True, increment=None):
+        """Return random integers.
+        
+        Parameters
+        ----------
+        size : int
+            Output size.  Default is None, in which case a single value is 
+            returned.
+        update : bool
+            Determines whether the rng's state is updated after this operation
+            or not. Default is True.
+        increment : int
+            Number of steps to move through the sequence between values.
+            Set to 1 to step fowards in the sequence and -1 to step backwards.
+            Default is None, in which case the current direction is used.
+    
+        Returns
+        -------
+        out : int or ndarray of uint64
+            1-D array of random unsigned integers of size `size` (unless
+            ``size=None``, in which case a single unsigned integer is
+            returned).
+        """
+
+        if increment is None:
+            increment = 1 if self.forward else -1
+        else:
+            assert increment != 0, "`increment` must not be zero."
+            if update:
+                self.forward = increment > 0
+        if size is None:
+            if update:
+                return self.jump(increment)
+            return self._value((self._x + increment) & 0xFFFFFFFFFFFFFFFF)
+        assert isinstance(size, (int, np.integer)) and size >= 0, \
+            "only 1-D arrays supported"
+        if increment in (-1, 1):
+            # Compute each block covering the positions only once and
+            # use all four of its words
             if increment == 1:
-                gen = self._next_state_generator(self.x, self.m, self.a, self.c)
+                lo = (self._x + 1) & 0xFFFFFFFFFFFFFFFF
             else:
-                gen = self._prev_state_generator(self.x, self.m, self.a_inverse, self.c)
-            assert np.ndim(size) == 0, "only 1-D arrays supported"
-            x = np.fromiter(gen, dtype='uint64', count=size)
-            if update:
-                self._x = int(x[-1])
-            return x >> self._d
+                lo = (self._x - size) & 0xFFFFFFFFFFFFFFFF
+            offset = lo & 3
+            n_blocks = (offset + size + 3) // 4
+            ctr = np.arange(n_blocks, dtype='uint64')
+            with np.errstate(over='ignore'):
+                ctr += np.uint64(lo >> 2)
+            # Block counters wrap around with the positions
+            ctr &= np.uint64(0x3FFFFFFFFFFFFFFF)
+            words = _philox4x32((ctr & np.uint64(0xFFFFFFFF),
+                                 ctr >> np.uint64(32), np.zeros_like(ctr),
+                                 np.zeros_like(ctr)), self._key)
+            out = np.stack(words, axis=1).ravel()[offset:offset + size]
+            if increment == -1:
+                out = out[::-1]
+        else:
+            x = np.arange(1, size + 1, dtype='uint64')
+            with np.errstate(over='ignore'):
+                x *= np.uint64(increment & 0xFFFFFFFFFFFFFFFF)
+                x += np.uint64(self._x)
+            ctr = x >> np.uint64(2)
+            words = _philox4x32((ctr & np.uint64(0xFFFFFFFF),
+                                 ctr >> np.uint64(32), np.zeros_like(ctr),
+                                 np.zeros_like(ctr)), self._key)
+            out = np.choose((x & np.uint64(3)).astype('intp'), words)
+        if update:
+            self.x = self._x + increment * size
+        return out
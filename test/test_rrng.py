@@ -6,21 +6,85 @@
 # python -m unittest
 #
 
+import os
+import shutil
+import subprocess
+import tempfile
 import unittest
+from unittest import mock
 import numpy as np
-from rrng import is_power_of_two, xgcd_x
+import rrng
+from rrng import is_power_of_two, xgcd_x, mod_inverse_pow2, _skip_ahead_coeffs
 from rrng import ReversibleLCG, GeneratorLCGReversible
+from rrng import _philox4x32, ReversiblePhilox
+
+
+def build_clib(tmpdir):
+    """Compiles _rrng.c into tmpdir and returns the loaded
+    library, or None if there is no C compiler.
+    """
+    cc = shutil.which(os.environ.get('CC', 'cc'))
+    if cc is None:
+        return None
+    src = os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), '_rrng.c')
+    path = os.path.join(tmpdir, '_rrng.so')
+    try:
+        subprocess.run([cc, '-O3', '-shared', '-fPIC', '-o', path, src],
+                       check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return rrng._load_clib(path)
 
 
 class TestRRNG(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        cls.clib = build_clib(cls._tmpdir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmpdir.cleanup()
+
+    def backends(self):
+        """Selects each available backend for the vectorized
+        methods in turn and yields its name.
+        """
+        for name, njit, clib in [('numpy', None, None),
+                                 ('numba', rrng.njit, None),
+                                 ('c', rrng.njit, self.clib)]:
+            if (name == 'numba' and njit is None
+                    or name == 'c' and clib is None):
+                continue
+            with mock.patch('rrng.njit', njit), mock.patch('rrng._clib', clib):
+                yield name
     
     def test_is_power_of_two(self):
-        self.assertTrue(all(is_power_of_two(x) for x in [0, 1, 2, 8, 256]))
-        self.assertFalse(any(is_power_of_two(x) for x in [-1, 3, 9, 257]))
+        self.assertTrue(all(is_power_of_two(x) for x in [1, 2, 8, 256]))
+        self.assertFalse(any(is_power_of_two(x) for x in [0, -1, 3, 9, 257]))
 
     def test_xgcd_x(self):
         self.assertEqual(xgcd_x(46, 240), 47)
 
+    def test_mod_inverse_pow2(self):
+        for k in [1, 2, 3, 8, 32, 63, 64, 128]:
+            for a in [1, 3, 47, 6364136223846793005, (1 << 127) - 1]:
+                x = mod_inverse_pow2(a, k)
+                self.assertEqual((a * x) % (1 << k), 1 % (1 << k))
+                self.assertTrue(0 <= x < 1 << k)
+        self.assertEqual(mod_inverse_pow2(47, 8) * 47 % 256,
+                         xgcd_x(47, 256) * 47 % 256)
+
+    def test_skip_ahead_coeffs(self):
+        a, c, m = 6364136223846793005, 1442695040888963407, 1 << 63
+        a_vec, c_vec = _skip_ahead_coeffs(a, c, m, 100)
+        x0, x = 42, 42
+        for i in range(100):
+            x = (a * x + c) & (m - 1)
+            self.assertEqual((int(a_vec[i]) * x0 + int(c_vec[i])) & (m - 1), x)
+
     def test_ReversibleLCG(self):
 
         # Values produced by rlcg.hpp with seed = 42
@@ -49,35 +113,223 @@ class TestRRNG(unittest.TestCase):
         self.assertEqual(x, list(reversed(test_values[:-1])))
         self.assertTrue(rng.forward)
 
-        # Class for producing arrays of random numbers
-        rng = GeneratorLCGReversible(42)
-        x = rng.random()
-        self.assertTrue(np.array_equal(x, test_values[1]))
+        # Constants are read-only and there is no instance dict
+        self.assertEqual(rng.max, (1 << 31) - 1)
+        for name in ['m', 'a', 'c', 'd', 'a_inverse', 'max']:
+            with self.assertRaises(AttributeError):
+                setattr(rng, name, 3)
+        self.assertFalse(hasattr(rng, '__dict__'))
 
-        rng = GeneratorLCGReversible(42)
-        x = rng.random(size=2)
-        self.assertTrue(np.array_equal(x, test_values[1:3]))
+        for backend in self.backends():
+            with self.subTest(backend=backend):
+                # Class for producing arrays of random numbers
+                rng = GeneratorLCGReversible(42)
+                self.assertFalse(hasattr(rng, '__dict__'))
+                x = rng.random()
+                self.assertTrue(np.array_equal(x, test_values[1]))
 
-        x = rng.random(size=3)
-        self.assertTrue(np.array_equal(x, test_values[3:]))
+                rng = GeneratorLCGReversible(42)
+                x = rng.random(size=2)
+                self.assertTrue(np.array_equal(x, test_values[1:3]))
 
-        rng.reverse()
-        x = rng.random()
-        self.assertEqual(x, test_values[4])
+                x = rng.random(size=3)
+                self.assertTrue(np.array_equal(x, test_values[3:]))
 
-        rng.reverse()
-        x = rng.random()
-        self.assertEqual(x, test_values[5])
+                rng.reverse()
+                x = rng.random()
+                self.assertEqual(x, test_values[4])
+
+                rng.reverse()
+                x = rng.random()
+                self.assertEqual(x, test_values[5])
+
+                rng.reverse()
+                x = rng.random(size=5, update=False)
+                self.assertTrue(np.array_equal(x, test_values[-2::-1]))
+
+                x = rng.random(size=5)
+                self.assertTrue(np.array_equal(x, test_values[-2::-1]))
+
+                x = rng.random(size=5, increment=1)
+                self.assertTrue(np.array_equal(x, test_values[1:]))
+
+                x = rng.random(size=5, increment=-1)
+                self.assertTrue(np.array_equal(x, test_values[-2::-1]))
+
+    def test_modulus_2_64(self):
+        for backend in self.backends():
+            with self.subTest(backend=backend):
+                # With m = 2**64 the low 63 bits of the state match m = 2**63
+                rng63 = GeneratorLCGReversible(42)
+                rng64 = GeneratorLCGReversible(42, m=1<<64)
+                for i in range(5):
+                    rng63.next()
+                    rng64.next()
+                    self.assertEqual(rng64.x & ((1<<63) - 1), rng63.x)
+
+                # Vectorized and scalar methods agree
+                rng = GeneratorLCGReversible(42, m=1<<64)
+                x = [rng.next() for i in range(10)]
+                rng.x = 42
+                self.assertTrue(np.array_equal(rng.random(size=10), x))
+                y = rng.random(size=10, increment=-1)
+                self.assertTrue(np.array_equal(y, x[-2::-1] + [0]))
 
+    def test_jump(self):
+        for backend in self.backends():
+            with self.subTest(backend=backend):
+                rng = GeneratorLCGReversible(42)
+                x = [rng.next() for i in range(1000)]
+                state = rng.x
+
+                rng = GeneratorLCGReversible(42)
+                self.assertEqual(rng.jump(1000), x[-1])
+                self.assertEqual(rng.x, state)
+                self.assertEqual(rng.jump(-990), x[9])
+                self.assertEqual(rng.jump(0), x[9])
+
+                # Arbitrary increments
+                rng = GeneratorLCGReversible(42)
+                self.assertEqual(rng.random(increment=3, update=False), x[2])
+                y = rng.random(size=5, increment=3)
+                self.assertTrue(np.array_equal(y, x[2:15:3]))
+                self.assertTrue(rng.forward)
+                self.assertEqual(rng.random(increment=-2), x[12])
+                self.assertFalse(rng.forward)
+                y = rng.random(size=4, increment=-3)
+                self.assertTrue(np.array_equal(y, x[9::-3]))
+
+    def test_random_threads(self):
+        for backend in self.backends():
+            with self.subTest(backend=backend):
+                for size, threads in [(1000, 4), (10, 4), (3, 8), (1, 2)]:
+                    for increment in [1, -1, 5]:
+                        rng1 = GeneratorLCGReversible(42)
+                        rng2 = GeneratorLCGReversible(42)
+                        x = rng1.random(size=size, increment=increment)
+                        y = rng2.random(size=size, increment=increment,
+                                        threads=threads)
+                        self.assertTrue(np.array_equal(x, y))
+                        self.assertEqual(rng1.x, rng2.x)
+
+    def test_random_f64(self):
+        for backend in self.backends():
+            with self.subTest(backend=backend):
+                rng = ReversibleLCG(42)
+                states = []
+                for i in range(5):
+                    rng.next()
+                    states.append(rng.x)
+                expected = [(x >> 10) / (1 << 53) for x in states]
+
+                rng = GeneratorLCGReversible(42)
+                self.assertEqual(rng.random_f64(update=False), expected[0])
+                x = rng.random_f64(size=5)
+                self.assertTrue(np.array_equal(x, expected))
+                self.assertEqual(rng.x, states[-1])
+                x = rng.random_f64(size=4, increment=-1)
+                self.assertTrue(np.array_equal(x, expected[-2::-1]))
+                self.assertEqual(rng.random_f64(increment=2), expected[2])
+
+                x = GeneratorLCGReversible(1).random_f64(size=10000)
+                self.assertTrue(np.all((x >= 0.0) & (x < 1.0)))
+
+    def test_philox4x32(self):
+
+        # Known-answer tests from the Random123 library
+        self.assertEqual(_philox4x32((0, 0, 0, 0), (0, 0)),
+                         (0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8))
+        self.assertEqual(_philox4x32((0xffffffff,) * 4, (0xffffffff,) * 2),
+                         (0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd))
+        self.assertEqual(
+            _philox4x32((0x243f6a88, 0x85a308d3, 0x13198a2e, 0x03707344),
+                        (0xa4093822, 0x299f31d0)),
+            (0xd16cfe09, 0x94fdcceb, 0x5001e420, 0x24126ea1)
+        )
+
+    def test_ReversiblePhilox(self):
+        rng = ReversiblePhilox(42)
+        x = [rng.next() for i in range(10)]
+        self.assertEqual(rng.x, 10)
+        self.assertEqual([rng.prev() for i in range(9)], x[-2::-1])
+        self.assertTrue(all(0 <= v <= rng.max for v in x))
+
+        # Constants are read-only and there is no instance dict
+        for name in ['key', 'max']:
+            with self.assertRaises(AttributeError):
+                setattr(rng, name, 3)
+        self.assertFalse(hasattr(rng, '__dict__'))
+
+        # Iterating in reverse
+        rng = ReversiblePhilox(42, x=10)
         rng.reverse()
-        x = rng.random(size=5, update=False)
-        self.assertTrue(np.array_equal(x, test_values[-2::-1]))
+        for i, v in enumerate(iter(rng)):
+            self.assertEqual(v, x[8 - i])
+            if i == 8:
+                break
+
+        # Vectorized methods
+        rng = ReversiblePhilox(42)
+        self.assertEqual(rng.random(update=False), x[0])
+        y = rng.random(size=10)
+        self.assertTrue(np.array_equal(y, x))
+        self.assertEqual(rng.x, 10)
+        y = rng.random(size=9, increment=-1)
+        self.assertTrue(np.array_equal(y, x[-2::-1]))
+        self.assertFalse(rng.forward)
+        y = rng.random(size=3, increment=3)
+        self.assertTrue(np.array_equal(y, x[3::3]))
+        self.assertEqual(rng.x, 10)
+
+        # Contiguous arrays across block boundaries and the wrap-around
+        # of the position at 2**64
+        for start in [0, 3, 5, (1 << 64) - 6, (1 << 64) - 1]:
+            for size in range(14):
+                rng = ReversiblePhilox(7, x=start)
+                x = [rng.next() for i in range(size)]
+                rng = ReversiblePhilox(7, x=start)
+                y = rng.random(size=size, increment=1)
+                self.assertTrue(np.array_equal(y, x))
+                self.assertEqual(rng.x, (start + size) % (1 << 64))
 
-        x = rng.random(size=5)
-        self.assertTrue(np.array_equal(x, test_values[-2::-1]))
+                rng = ReversiblePhilox(7, x=start)
+                x = [rng.prev() for i in range(size)]
+                rng = ReversiblePhilox(7, x=start)
+                y = rng.random(size=size, increment=-1)
+                self.assertTrue(np.array_equal(y, x))
+                self.assertEqual(rng.x, (start - size) % (1 << 64))
 
-        x = rng.random(size=5, increment=1)
-        self.assertTrue(np.array_equal(x, test_values[1:]))
+    def test_seed_out_of_range(self):
+        for backend in self.backends():
+            with self.subTest(backend=backend):
+                # Seeds are reduced modulo m
+                for seed, expected in [
+                    (-1, [1001621329, 833181039, 267521707]),
+                    (1 << 70, [335903614, 436792849, 452360226]),
+                    ((1 << 64) + 42, [293047021, 968358053, 1773127077])
+                ]:
+                    rng = ReversibleLCG(seed)
+                    self.assertEqual([rng.next() for i in range(3)], expected)
+                    rng = GeneratorLCGReversible(seed)
+                    y = rng.random(size=3)
+                    self.assertTrue(np.array_equal(y, expected))
+                    rng = GeneratorLCGReversible(seed)
+                    y = rng.random(size=3, threads=2)
+                    self.assertTrue(np.array_equal(y, expected))
+                    rng = GeneratorLCGReversible(seed)
+                    self.assertEqual(rng.random_f64(size=3)[0],
+                                     GeneratorLCGReversible(seed).random_f64())
 
-        x = rng.random(size=5, increment=-1)
-        self.assertTrue(np.array_equal(x, test_values[-2::-1]))
+    def test_clib(self):
+        if self.clib is None:
+            self.skipTest("no C compiler to build _rrng.c")
+        with mock.patch('rrng._clib', self.clib):
+            for m in [1 << 63, 1 << 64]:
+                for increment in [1, -1, 3]:
+                    for n in range(10):
+                        rng = ReversibleLCG(42, m=m)
+                        x = [rng.jump(increment) for i in range(n)]
+                        gen = GeneratorLCGReversible(42, m=m)
+                        y = gen.random(size=n, increment=increment)
+                        self.assertTrue(np.array_equal(x, y))
+                        self.assertEqual(gen.x, rng.x)